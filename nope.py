@@ -1,19 +1,34 @@
 #!/usr/bin/env python3
 
-import subprocess
+import asyncio
+import functools
+import importlib.util
+import os
 import shlex
 import sys
-from typing import List, Dict, Any, Optional
+from enum import Enum
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import uvicorn
 
+# Serialize API responses with orjson when it is installed
+if importlib.util.find_spec("orjson") is not None:
+    from fastapi.responses import ORJSONResponse as CommandJSONResponse
+else:
+    from fastapi.responses import JSONResponse as CommandJSONResponse
+
+try:
+    import readline  # Enables line editing and history for input() in the CLI
+except ImportError:  # Not available on Windows
+    pass
+
 # ============================
 # Command Categorization Lists
 # ============================
 
 # 1. Strictly Prohibited Commands (nopeCommands)
-nope_commands = [
+nope_commands = frozenset({
     # System and File Manipulation
     'rm', 'chmod', 'chown', 'chgrp', 'mkfs', 'mount', 'umount', 'dd',
 
@@ -37,10 +52,10 @@ nope_commands = [
 
     # System History
     'history'
-]
+})
 
 # 2. Confirmation-Required Commands (confirmCommands)
-confirm_commands = [
+confirm_commands = frozenset({
     # Remote File Fetching
     'curl', 'wget',
 
@@ -85,47 +100,91 @@ confirm_commands = [
 
     # Miscellaneous Risky Commands
     'alias', 'reset', 'stty'
-]
+})
+
+# Split confirm_commands so multi-token patterns like 'ln -s' are matched on
+# their leading arguments rather than compared against the base command alone.
+confirm_single = frozenset(cmd for cmd in confirm_commands if ' ' not in cmd)
+confirm_multi: Dict[str, List[Tuple[str, ...]]] = {}
+for _pattern in confirm_commands:
+    if ' ' in _pattern:
+        _first, *_rest = _pattern.split()
+        confirm_multi.setdefault(_first, []).append(tuple(_rest))
+del _pattern
 
 # 3. Secondary Filters (secondaryFilters)
+TRUSTED_HOST_PREFIX = '--trusted-host'
+
+def _pip_install_cond(args: List[str]) -> bool:
+    """Check if pip install uses a trusted host or runs within a virtual environment."""
+    return any(arg.startswith(TRUSTED_HOST_PREFIX) for arg in args) or is_within_virtualenv()
+
+def _npm_install_cond(args: List[str]) -> bool:
+    """Check if npm install is local and runs within a project directory."""
+    return '-g' not in args and is_within_project_directory()
+
+def _docker_cond(args: List[str]) -> bool:
+    """Check if the docker command runs or builds an image."""
+    return 'run' in args or 'build' in args
+
+def _ssh_cond(args: List[str]) -> bool:
+    """Check if the SSH target is a trusted host."""
+    return is_trusted_host(args[-1]) if args else False
+
+def _git_push_cond(args: List[str]) -> bool:
+    """Check if git push targets an allowed remote."""
+    return is_allowed_remote(args[-1]) if args else False
+
 # Each filter includes the command, optional subcommand, condition function, and message.
 secondary_filters = [
     {
         "command": "pip",
         "subcommand": "install",
-        "condition": lambda args: any(arg.startswith('--trusted-host') for arg in args) or is_within_virtualenv(),
+        "condition": _pip_install_cond,
         "message": "Ensure that pip installations are from trusted sources or within a virtual environment."
     },
     {
         "command": "npm",
         "subcommand": "install",
-        "condition": lambda args: '-g' not in args and is_within_project_directory(),
+        "condition": _npm_install_cond,
         "message": "NPM installations are allowed only within the project directory and without global flags."
     },
     {
         "command": "docker",
         "subcommand": None,
-        "condition": lambda args: 'run' in args or 'build' in args,
+        "condition": _docker_cond,
         "message": "Docker operations are restricted to running or building images without modifying the host system."
     },
     {
         "command": "ssh",
         "subcommand": None,
-        "condition": lambda args: is_trusted_host(args[-1]) if args else False,
+        "condition": _ssh_cond,
         "message": "SSH connections are allowed only to predefined trusted hosts."
     },
     {
         "command": "git",
         "subcommand": "push",
-        "condition": lambda args: is_allowed_remote(args[-1]) if args else False,
+        "condition": _git_push_cond,
         "message": "Git push operations are restricted to allowed remote repositories."
     }
 ]
 
+# Secondary filters indexed by base command for constant-time lookup.
+# Filters keep their declaration order within each command.
+secondary_filters_by_cmd: Dict[str, List[Dict[str, Any]]] = {}
+for _filter in secondary_filters:
+    secondary_filters_by_cmd.setdefault(_filter["command"], []).append(_filter)
+del _filter
+
 # ============================
 # Helper Functions
 # ============================
 
+# Hosts and remotes permitted by the ssh and git push secondary filters.
+trusted_hosts = frozenset({'github.com', 'gitlab.com', 'bitbucket.org'})
+allowed_remotes = frozenset({'origin', 'upstream'})
+
+@functools.cache
 def is_within_virtualenv() -> bool:
     """Check if the current environment is a Python virtual environment."""
     return (hasattr(sys, 'real_prefix') or 
@@ -133,20 +192,25 @@ def is_within_virtualenv() -> bool:
 
 def is_within_project_directory() -> bool:
     """Check if the current working directory is a project directory."""
-    # Placeholder: Implement logic to determine if within a project directory
-    # For example, check for presence of certain files like requirements.txt, package.json, etc.
-    required_files = ['requirements.txt', 'package.json', 'Pipfile', 'pyproject.toml']
-    cwd_files = subprocess.check_output(['ls']).decode().split()
-    return any(file in cwd_files for file in required_files)
+    return _is_project_directory(os.getcwd())
+
+# Commands run as child processes, so this tool's own working directory never changes and
+# the result is effectively cached for the lifetime of the process: marker files created
+# later in the session (e.g. by `npm init`) are not seen until restart.
+@functools.lru_cache(maxsize=1)
+def _is_project_directory(cwd: str) -> bool:
+    """Check a directory for project marker files, caching the last result."""
+    # Look for marker files such as requirements.txt or package.json without spawning a process
+    required_files = {'requirements.txt', 'package.json', 'Pipfile', 'pyproject.toml'}
+    with os.scandir(cwd) as entries:
+        return any(entry.name in required_files for entry in entries)
 
 def is_trusted_host(host: str) -> bool:
-    """Check if the SSH host is in the list of trusted hosts."""
-    trusted_hosts = ['github.com', 'gitlab.com', 'bitbucket.org']
+    """Check if the SSH host is in the set of trusted hosts."""
     return host in trusted_hosts
 
 def is_allowed_remote(remote: str) -> bool:
-    """Check if the Git remote is in the list of allowed remotes."""
-    allowed_remotes = ['origin', 'upstream']
+    """Check if the Git remote is in the set of allowed remotes."""
     return remote in allowed_remotes
 
 def confirm(prompt: str) -> bool:
@@ -164,68 +228,135 @@ def confirm(prompt: str) -> bool:
 # Command Execution Function
 # ============================
 
-def execute_command(command: str, user_confirm: Optional[bool] = None) -> str:
+def classify(parts: List[str]) -> Tuple[str, Optional[str]]:
     """
-    Classify and execute a command based on predefined categories.
+    Classify a parsed command against the predefined categories.
 
     Args:
-        command (str): The full command string to execute.
-        user_confirm (Optional[bool]): Confirmation from API client. If None, prompt user in CLI.
+        parts (List[str]): The command split into tokens; must not be empty.
 
     Returns:
-        str: Result message indicating the action taken.
+        Tuple[str, Optional[str]]: One of ("blocked", msg), ("needs_confirm", msg),
+        ("filter_confirm", msg) or ("ok", None).
     """
-    parts = shlex.split(command)
-    if not parts:
-        return "❌ No command provided."
-
     base_command = parts[0]
     args = parts[1:]
 
     # Check for strictly prohibited commands
     if base_command in nope_commands:
-        return f"❌ The command '{base_command}' is restricted and cannot be executed."
+        return "blocked", f"❌ The command '{base_command}' is restricted and cannot be executed."
 
     # Check for confirmation-required commands
-    if base_command in confirm_commands:
-        if user_confirm is None:
-            # CLI prompt
-            prompt_msg = f"⚠️ The command '{command}' may pose risks. Do you want to proceed?"
-            user_confirm = confirm(prompt_msg)
-        elif not user_confirm:
-            return "⏸️ Command execution cancelled by the user."
-
-        if not user_confirm:
-            return "⏸️ Command execution cancelled by the user."
+    if base_command in confirm_single or any(
+        tuple(args[:len(pattern)]) == pattern for pattern in confirm_multi.get(base_command, ())
+    ):
+        return "needs_confirm", "Confirmation required for this command."
 
     # Check for secondary filters
-    for filter in secondary_filters:
-        if filter["command"] == base_command:
-            subcmd = filter.get("subcommand")
-            if subcmd and len(args) > 0 and args[0] != subcmd:
-                continue  # Subcommand does not match
-            if filter["condition"](args):
-                if user_confirm is None:
-                    # CLI prompt
-                    prompt_msg = f"⚠️ {filter['message']} Do you want to proceed with the command '{command}'?"
-                    user_confirm = confirm(prompt_msg)
-                elif not user_confirm:
-                    return "⏸️ Command execution cancelled by the user."
-
-                if not user_confirm:
-                    return "⏸️ Command execution cancelled by the user."
-
-    # Proceed with command execution
+    for filter in secondary_filters_by_cmd.get(base_command, ()):
+        subcmd = filter.get("subcommand")
+        if subcmd and len(args) > 0 and args[0] != subcmd:
+            continue  # Subcommand does not match
+        if filter["condition"](args):
+            return "filter_confirm", filter["message"]
+
+    return "ok", None
+
+class Status(str, Enum):
+    """Outcome of a command request, mirrored in the API response status."""
+    SUCCESS = "success"
+    ERROR = "error"
+    BLOCKED = "blocked"
+    CANCELLED = "cancelled"
+    CONFIRM_REQUIRED = "confirm_required"
+
+async def run_command(parts: List[str]) -> Tuple[Status, str]:
+    """
+    Execute an already classified command.
+
+    The command runs via asyncio subprocesses so concurrent API requests
+    do not block the event loop while waiting on each other.
+
+    Args:
+        parts (List[str]): The command split into tokens.
+
+    Returns:
+        Tuple[Status, str]: The outcome and a message with the command output or error.
+    """
     try:
         # Execute the command safely without using shell=True
-        result = subprocess.run(parts, capture_output=True, text=True, check=True)
-        return f"✅ Command executed successfully.\nOutput:\n{result.stdout}"
-    except subprocess.CalledProcessError as e:
-        return f"❌ Command execution failed.\nError:\n{e.stderr}"
+        proc = await asyncio.create_subprocess_exec(
+            *parts,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        # Only decode the stream that is reported back
+        if proc.returncode != 0:
+            return Status.ERROR, f"❌ Command execution failed.\nError:\n{stderr.decode('utf-8', errors='replace')}"
+        return Status.SUCCESS, f"✅ Command executed successfully.\nOutput:\n{stdout.decode('utf-8', errors='replace')}"
     except FileNotFoundError:
-        return f"❌ Command '{base_command}' not found."
+        return Status.ERROR, f"❌ Command '{parts[0]}' not found."
     except Exception as e:
-        return f"❌ An unexpected error occurred: {str(e)}"
+        return Status.ERROR, f"❌ An unexpected error occurred: {str(e)}"
+
+async def _execute_parts(
+    parts: List[str],
+    original: str,
+    user_confirm: Optional[bool] = None,
+    prompt: Optional[Callable[[str], bool]] = confirm,
+) -> Tuple[Status, str]:
+    """
+    Classify and execute an already parsed command.
+
+    Args:
+        parts (List[str]): The command split into tokens with shlex.split.
+        original (str): The command as entered, used in confirmation prompts.
+        user_confirm (Optional[bool]): Confirmation from API client. If None, ask via prompt.
+        prompt (Optional[Callable[[str], bool]]): Asks the user for confirmation. If None,
+            Status.CONFIRM_REQUIRED is returned instead of prompting.
+
+    Returns:
+        Tuple[Status, str]: The outcome and a message indicating the action taken.
+    """
+    if not parts:
+        return Status.ERROR, "❌ No command provided."
+
+    decision, message = classify(parts)
+    if decision == "blocked":
+        return Status.BLOCKED, message
+
+    if decision in ("needs_confirm", "filter_confirm"):
+        if user_confirm is None:
+            if prompt is None:
+                if decision == "needs_confirm":
+                    return Status.CONFIRM_REQUIRED, f"{message} Please set 'confirm' to true or false."
+                return Status.CONFIRM_REQUIRED, f"Confirmation required: {message}"
+
+            if decision == "needs_confirm":
+                prompt_msg = f"⚠️ The command '{original}' may pose risks. Do you want to proceed?"
+            else:
+                prompt_msg = f"⚠️ {message} Do you want to proceed with the command '{original}'?"
+            user_confirm = prompt(prompt_msg)
+
+        if not user_confirm:
+            return Status.CANCELLED, "⏸️ Command execution cancelled by the user."
+
+    return await run_command(parts)
+
+def execute_command(command: str, user_confirm: Optional[bool] = None) -> str:
+    """
+    Classify and execute a command based on predefined categories.
+
+    Args:
+        command (str): The full command string to execute.
+        user_confirm (Optional[bool]): Confirmation from API client. If None, prompt user in CLI.
+
+    Returns:
+        str: Result message indicating the action taken.
+    """
+    _, message = asyncio.run(_execute_parts(shlex.split(command), command, user_confirm))
+    return message
 
 # ============================
 # FastAPI Setup
@@ -237,12 +368,13 @@ class CommandRequest(BaseModel):
     command: str
     confirm: Optional[bool] = None  # For API clients to provide confirmation
 
+# Documents the /execute response schema; responses are built directly as JSON
 class CommandResponse(BaseModel):
     status: str
     message: str
 
 @app.post("/execute", response_model=CommandResponse)
-def api_execute_command(request: CommandRequest):
+async def api_execute_command(request: CommandRequest):
     """
     API endpoint to classify and execute a command.
 
@@ -250,64 +382,68 @@ def api_execute_command(request: CommandRequest):
         request (CommandRequest): The command and optional confirmation.
 
     Returns:
-        CommandResponse: The result of the command execution.
+        CommandResponse: The result of the command execution, returned as a
+        prebuilt JSON response to skip per-request model validation.
     """
-    command = request.command
-    user_confirm = request.confirm
-
-    if any(cmd == command.split()[0] for cmd in nope_commands):
-        return CommandResponse(status="blocked", message=f"❌ The command '{command.split()[0]}' is restricted and cannot be executed.")
-
-    # Determine if confirmation is required
-    if any(cmd == command.split()[0] for cmd in confirm_commands):
-        if user_confirm is None:
-            raise HTTPException(status_code=400, detail="Confirmation required for this command. Please set 'confirm' to true or false.")
-        elif not user_confirm:
-            return CommandResponse(status="cancelled", message="⏸️ Command execution cancelled by the user.")
-
-    # Check for secondary filters
-    applicable_filters = [f for f in secondary_filters if f["command"] == command.split()[0]]
-    for filter in applicable_filters:
-        if filter["condition"](command.split()[1:]):
-            if user_confirm is None:
-                raise HTTPException(status_code=400, detail=f"Confirmation required: {filter['message']}")
-            elif not user_confirm:
-                return CommandResponse(status="cancelled", message="⏸️ Command execution cancelled by the user.")
-
-    # Execute the command
-    result_message = execute_command(command, user_confirm)
-    if result_message.startswith("✅"):
-        return CommandResponse(status="success", message=result_message)
-    elif result_message.startswith("⏸️"):
-        return CommandResponse(status="cancelled", message=result_message)
-    else:
-        return CommandResponse(status="error", message=result_message)
+    try:
+        parts = shlex.split(request.command)
+    except ValueError as e:
+        return CommandJSONResponse({"status": Status.ERROR.value, "message": f"❌ Could not parse command: {str(e)}"})
+    status, message = await _execute_parts(parts, request.command, request.confirm, prompt=None)
+    if status is Status.CONFIRM_REQUIRED:
+        raise HTTPException(status_code=400, detail=message)
+    return CommandJSONResponse({"status": status.value, "message": message})
 
 # ============================
 # CLI Interface
 # ============================
 
+def _read_commands(interactive: bool) -> Iterator[str]:
+    """Yield command lines from the prompt when interactive, otherwise from piped stdin."""
+    if not interactive:
+        yield from sys.stdin
+        return
+    while True:
+        try:
+            yield input("Enter command: ")
+        except EOFError:
+            return
+
 def cli_interface():
     """
     Command-Line Interface to interactively input and execute commands.
+
+    When stdin is not a terminal, commands are read line by line from it without prompting,
+    and commands that need confirmation are skipped.
     """
-    print("=== Command Execution Interface ===")
-    print("Type 'exit' to quit.")
-    while True:
-        try:
-            user_input = input("Enter command: ").strip()
+    interactive = sys.stdin.isatty()
+    if interactive:
+        print("=== Command Execution Interface ===")
+        print("Type 'exit' to quit.")
+    # Piped stdin carries commands, not answers, so never prompt for confirmation there
+    prompt = confirm if interactive else None
+    # A single event loop serves the whole session instead of one per command
+    loop = asyncio.new_event_loop()
+    try:
+        for user_input in _read_commands(interactive):
+            user_input = user_input.strip()
             if user_input.lower() in ['exit', 'quit']:
                 print("Exiting CLI.")
                 break
-            if not user_input:
-                continue
-            result = execute_command(user_input)
-            print(result)
-        except KeyboardInterrupt:
-            print("\nExiting CLI.")
-            break
-        except Exception as e:
-            print(f"❌ An unexpected error occurred: {str(e)}")
+            try:
+                parts = shlex.split(user_input)
+                if not parts:
+                    continue
+                status, result = loop.run_until_complete(_execute_parts(parts, user_input, prompt=prompt))
+                if status is Status.CONFIRM_REQUIRED:
+                    result = f"⏸️ Skipped '{user_input}': confirmation cannot be given when reading commands from a pipe."
+                print(result)
+            except Exception as e:
+                print(f"❌ An unexpected error occurred: {str(e)}")
+    except KeyboardInterrupt:
+        print("\nExiting CLI.")
+    finally:
+        loop.close()
 
 # ============================
 # Main Execution
@@ -321,12 +457,29 @@ if __name__ == "__main__":
     parser.add_argument('--cli', action='store_true', help="Run as CLI tool")
     parser.add_argument('--host', type=str, default="127.0.0.1", help="API server host")
     parser.add_argument('--port', type=int, default=8000, help="API server port")
+    # uvicorn runs multiple workers on a selector event loop on Windows, which cannot spawn subprocesses
+    default_workers = 1 if sys.platform == "win32" else (os.cpu_count() or 1)
+    parser.add_argument('--workers', type=int, default=default_workers,
+                        help="Number of API worker processes (always 1 on Windows)")
 
     args = parser.parse_args()
 
     if args.api:
+        if sys.platform == "win32" and args.workers > 1:
+            parser.error("--workers > 1 is not supported on Windows: commands cannot be spawned under multiple workers")
         print(f"Starting FastAPI server at http://{args.host}:{args.port}")
-        uvicorn.run(app, host=args.host, port=args.port)
+        # Multiple workers require the app as an import string; "auto" picks uvloop and
+        # httptools whenever they are importable and falls back otherwise
+        uvicorn.run(
+            f"{os.path.splitext(os.path.basename(__file__))[0]}:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            loop="auto",
+            http="auto",
+            log_level="warning",
+        )
     elif args.cli:
         cli_interface()
     else: